@@ -0,0 +1,93 @@
+"""Client for the experiments launcher daemon (see ExpsDaemon)
+
+    Examples:
+        python -m exps_launcher.ExpsClient script=script1 config=conf1 [<overwrite script-specific parameters>] [exps.fake=true]
+        python -m exps_launcher.ExpsClient status [<run ids>]
+        python -m exps_launcher.ExpsClient stop [<run ids>]
+
+"""
+import json
+import os
+import socket
+import sys
+
+
+class ExpsClient():
+    """Send launch requests to a running ExpsDaemon over its Unix socket"""
+
+    def __init__(self,
+                 socket_filename: str = os.path.join('exps_launcher_configs', 'daemon.sock'),
+                 timeout: float = None):
+        """
+            socket_filename : path to the Unix socket the daemon is listening on
+            timeout : seconds to wait for the launch request to be executed (no timeout if None)
+        """
+        self.socket_filename = socket_filename
+        self.timeout = timeout
+
+    def launch(self, *args, cwd=None):
+        """Launch experiments through the daemon.
+
+            args : cli-like args, e.g. launch('script=script1', 'config=[conf1]', 'sweep.seed=[42,43]')
+            cwd : directory from which scripts are launched (default: current directory)
+
+            Returns (success, output of the launch). The ids of the local runs queued
+            by the daemon are stored in `self.last_run_ids`
+        """
+        reply = self._request({'op': 'launch', 'args': list(args), 'cwd': os.path.abspath(cwd if cwd is not None else os.getcwd())})
+        self.last_run_ids = reply.get('runs', [])
+        return reply['success'], reply['output']
+
+    def status(self, run_ids=None):
+        """Returns the list of local runs of the daemon (all of them if run_ids is None),
+           each with its id, script, log, state, pid and exit code
+        """
+        return self._request({'op': 'status', 'runs': run_ids})['runs']
+
+    def stop(self, run_ids=None):
+        """Stop local runs of the daemon (all of them if run_ids is None).
+           Returns the ids of the runs stopped
+        """
+        return self._request({'op': 'stop', 'runs': run_ids})['runs']
+
+    def _request(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(self.timeout)
+            client.connect(self.socket_filename)
+            client.sendall((json.dumps(request) + '\n').encode('utf-8'))
+
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+
+        if len(data) == 0:
+            raise ConnectionError(f'No reply from the experiments launcher daemon at {self.socket_filename}')
+
+        reply = json.loads(data.decode('utf-8'))
+        if not reply['success'] and request['op'] != 'launch':
+            raise ValueError(reply['output'])
+        return reply
+
+
+def main():
+    socket_filename = os.environ.get('EXPS_DAEMON_SOCKET', os.path.join('exps_launcher_configs', 'daemon.sock'))
+    client = ExpsClient(socket_filename=socket_filename)
+    args = sys.argv[1:]
+
+    if len(args) > 0 and args[0] == 'status':
+        for run in client.status(args[1:] if len(args) > 1 else None):
+            exit_code = run['exit_code'] if run['exit_code'] is not None else '-'
+            print(f'{run["id"]}  {run["state"]:<10}  pid: {run["pid"] or "-"}  exit code: {exit_code}  log: {run["log"]}')
+    elif len(args) > 0 and args[0] == 'stop':
+        stopped = client.stop(args[1:] if len(args) > 1 else None)
+        print(f'Stopped runs: {" ".join(stopped) if len(stopped) > 0 else "none"}')
+    else:
+        success, output = client.launch(*args)
+        print(output, end='')
+        sys.exit(0 if success else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""Resident experiments launcher, serving launch requests over a Unix socket
+
+    Examples:
+        python -m exps_launcher.ExpsDaemon --root exps_launcher_configs [--max-cores 32] [--max-jobs 500] [--preload torch gym]
+
+"""
+import argparse
+from collections import deque
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import subprocess
+import threading
+import time
+import traceback
+
+from exps_launcher.ExpsLauncher import ExpsLauncher
+from exps_launcher.ForkExecutor import ForkExecutor
+
+
+class ExpsDaemon(ExpsLauncher):
+    """Long-running ExpsLauncher serving launch requests.
+
+        Config files stay parsed in memory (and are reloaded when modified).
+        Launch requests, received over a Unix socket (see ExpsClient) or through
+        `submit()`, are executed one at a time by a single submission worker.
+        Local background runs and smoke tests are scheduled by the daemon itself,
+        and only started when enough cpu cores are free among the `max_cores`
+        shared by all launch requests. Local runs can be listed with `status()`
+        and stopped with `stop()`.
+
+        Runs with exps.executor=fork are forked by a single-threaded fork server,
+        started (with the preloaded modules) before the daemon starts any thread.
+    """
+
+    def __init__(self,
+                 root : str,
+                 socket_filename: str = None,
+                 max_cores: int = None,
+                 max_jobs: int = None,
+                 max_pending: int = 16,
+                 preload: list = [],
+                 infer_cpus_per_task: bool = True):
+        """
+            root : path to configuration files
+            socket_filename : path to the Unix socket (default: <root>/daemon.sock)
+            max_cores : max number of cpu cores used at the same time by local runs
+                        (default: all available cores but one)
+            max_jobs : max number of jobs that a single launch request can submit (no limit if None)
+            max_pending : max number of launch requests waiting to be executed
+            preload : list of modules imported by the fork server, for runs with exps.executor=fork
+            infer_cpus_per_task : see ExpsLauncher
+        """
+        super().__init__(root=os.path.abspath(root), infer_cpus_per_task=infer_cpus_per_task)
+        self.socket_filename = os.path.abspath(socket_filename) if socket_filename is not None else os.path.join(self.root, 'daemon.sock')
+        self.max_cores = max_cores if max_cores is not None else multiprocessing.cpu_count() - 1
+        self.max_jobs = max_jobs
+
+        # Started now, while the daemon is still single-threaded
+        self.fork_executor = ForkExecutor(preload=preload)
+
+        self.launch_queue = queue.Queue(maxsize=max_pending)
+        self.local_queue = deque()  # ids of local runs waiting for free cpu cores
+        self.runs = {}  # run id -> status of local run (see _queue_local_run)
+        self.run_starters = {}  # run id -> function starting the run
+        self.run_processes = {}  # run id -> Popen of running shell commands
+        self.forked_runs = {}  # pid -> run id of running forked scripts
+        self.launched_run_ids = []  # ids of local runs queued by the current launch request
+        self.cores_in_use = 0
+        self.local_lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def serve_forever(self):
+        """Start the submission and local scheduling workers,
+           and serve launch requests on the Unix socket until shutdown()
+        """
+        server = self._open_socket()
+        threading.Thread(target=self._launch_worker, daemon=True).start()
+        threading.Thread(target=self._local_scheduler, daemon=True).start()
+        print(f'Experiments launcher daemon listening on {self.socket_filename}')
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle_connection, args=(connection,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            server.close()
+            if os.path.exists(self.socket_filename):
+                os.remove(self.socket_filename)
+
+    def shutdown(self):
+        self.stop_event.set()
+
+    def submit(self, args, cwd=None, block=True):
+        """Submit a launch request from Python
+
+            args : list of cli-like args, e.g. ['script=script1', 'config=[conf1]', 'sweep.seed=[42,43]']
+            cwd : directory from which scripts are launched (default: current directory)
+
+            Returns (success, output of the launch, ids of the local runs queued),
+            or a queue where these are put if block=False
+        """
+        reply_queue = queue.Queue(maxsize=1)
+        try:
+            self.launch_queue.put_nowait((list(args), cwd if cwd is not None else os.getcwd(), reply_queue))
+        except queue.Full:
+            reply_queue.put((False, f'--- ERROR! Too many pending launch requests ({self.launch_queue.maxsize}). Try again later.', []))
+
+        return reply_queue.get() if block else reply_queue
+
+    def status(self, run_ids=None):
+        """Returns the status of local runs (all of them if run_ids is None):
+           id, script, log, state (queued, running, finished, stopped), pid and exit code
+        """
+        with self.local_lock:
+            return [dict(run) for run_id, run in self.runs.items() if run_ids is None or run_id in run_ids]
+
+    def stop(self, run_ids=None):
+        """Stop local runs (all of them if run_ids is None): queued runs are
+           removed from the queue, running ones are killed.
+           Returns the ids of the runs stopped
+        """
+        stopped = []
+        with self.local_lock:
+            for run_id, run in self.runs.items():
+                if run_ids is not None and run_id not in run_ids:
+                    continue
+                if run['state'] == 'queued':
+                    self.local_queue.remove(run_id)
+                    del self.run_starters[run_id]
+                elif run['state'] == 'running':
+                    try:
+                        os.killpg(run['pid'], signal.SIGTERM)  # runs are started in their own session
+                    except ProcessLookupError:
+                        pass
+                else:
+                    continue
+                run['state'] = 'stopped'
+                stopped.append(run_id)
+        return stopped
+
+    def ask_confirmation(self, msg):
+        """Launch requests are confirmed by the caller when submitting them"""
+        return True
+
+    def _open_socket(self):
+        if os.path.exists(self.socket_filename):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_filename)
+                raise RuntimeError(f'An experiments launcher daemon is already listening on {self.socket_filename}')
+            except ConnectionRefusedError:
+                os.remove(self.socket_filename)  # stale socket from a previous daemon
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_filename)
+        os.chmod(self.socket_filename, 0o600)
+        server.listen()
+        server.settimeout(0.5)
+        return server
+
+    def _handle_connection(self, connection):
+        """Read one JSON request per connection (`launch`, `status` or `stop`), and reply with its outcome"""
+        with connection:
+            try:
+                request = self._recv_line(connection)
+                request = json.loads(request)
+                op = request.get('op', 'launch')
+                if op == 'launch':
+                    assert isinstance(request.get('args', None), list), 'Launch request should have a list of `args`.'
+                    success, output, run_ids = self.submit(request['args'], cwd=request.get('cwd', None))
+                    reply = {'success': success, 'output': output, 'runs': run_ids}
+                elif op == 'status':
+                    reply = {'success': True, 'runs': self.status(request.get('runs', None))}
+                elif op == 'stop':
+                    reply = {'success': True, 'runs': self.stop(request.get('runs', None))}
+                else:
+                    raise ValueError(f'unknown request `{op}`')
+            except Exception as error:
+                reply = {'success': False, 'output': f'--- ERROR! Invalid request: {error}'}
+
+            try:
+                connection.sendall((json.dumps(reply) + '\n').encode('utf-8'))
+            except OSError:
+                pass  # client is gone
+
+    def _recv_line(self, connection):
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return data.decode('utf-8')
+
+    def _launch_worker(self):
+        """Execute launch requests one at a time"""
+        while not self.stop_event.is_set():
+            try:
+                args, cwd, reply_queue = self.launch_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            output = io.StringIO()
+            success = False
+            self.launched_run_ids = []
+            try:
+                with contextlib.redirect_stdout(output):
+                    os.chdir(cwd)
+                    cli_args = self.args_parser.parse_from_dotlist(args)
+                    success = self.launch(cli_args) is not False
+                    if len(self.launched_run_ids) > 0:
+                        print(f'\nCheck status (and PIDs once started) with: python -m exps_launcher.ExpsClient status {" ".join(self.launched_run_ids)}')
+                        print(f'Stop these runs with: python -m exps_launcher.ExpsClient stop {" ".join(self.launched_run_ids)}')
+            except BaseException:
+                output.write(traceback.format_exc())
+
+            reply_queue.put((success, output.getvalue(), list(self.launched_run_ids)))
+
+    def _launch_jobs(self, host_params, script_params, sweep_params, default_name, fake=False, test=False, with_slurm=True, exps_params={}):
+        """Enforce the max number of jobs per launch request"""
+        n_exps = self._get_n_exps(sweep_params, exps_params)
+        if self.max_jobs is not None and not test and n_exps > self.max_jobs:
+            raise ValueError(f'{n_exps} jobs requested, but the daemon accepts at most {self.max_jobs} jobs per launch request.')
+
+        return super()._launch_jobs(host_params, script_params, sweep_params, default_name, fake=fake, test=test, with_slurm=with_slurm, exps_params=exps_params)
+
+    def _execute_foreground(self, command, fake=False):
+        """Execute command on the shell, capturing its output for the caller"""
+        if fake:
+            print(command)
+        else:
+            result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            print(result.stdout, end='')
+
+    def _check_available_cores(self, n_of_configs, n_cores_per_config):
+        """Runs are queued until enough cores are free, so each of them only needs to fit on its own"""
+        assert n_cores_per_config <= self.max_cores, f'A single run requests {n_cores_per_config} cores, but the daemon allows at most {self.max_cores} cores.'
+
+    def _get_smoke_workers(self, workers, n_commands, n_cores):
+        """Smoke test runs cannot use more than the daemon's max cores at a time"""
+        return min(super()._get_smoke_workers(workers, n_commands, n_cores), self.max_cores // n_cores)
+
+    def _run_smoke_test(self, commands, workers, timeout=None, n_cores=1):
+        """Run the smoke test within the daemon's cpu cores budget:
+           the cores of all its workers are reserved until the smoke test ends
+        """
+        reserved_cores = workers * n_cores
+
+        while True:
+            with self.local_lock:
+                if self.cores_in_use + reserved_cores <= self.max_cores:
+                    self.cores_in_use += reserved_cores
+                    break
+            time.sleep(0.1)
+
+        try:
+            return super()._run_smoke_test(commands, workers, timeout=timeout, n_cores=n_cores)
+        finally:
+            with self.local_lock:
+                self.cores_in_use -= reserved_cores
+
+    def _get_fork_executor(self, preload=[]):
+        """Reuse the daemon's fork server, which stays warm across launch requests"""
+        self.fork_executor.preload(preload)
+        return self.fork_executor
+
+    def _execute_background(self, command, stdout=None, stderr=None, fake=False, outfilename='', n_cores=None, run_id=None):
+        """Queue command to be executed when enough cpu cores are free"""
+        if fake:
+            return super()._execute_background(command, stdout=stdout, stderr=stderr, fake=fake, outfilename=outfilename, n_cores=n_cores, run_id=run_id)
+
+        # Run the command in foreground within its own shell, so that the daemon can track when it ends
+        command = command.rstrip().rstrip('&')
+        cwd = os.getcwd()
+        def start():
+            return subprocess.Popen(command, shell=True, cwd=cwd, start_new_session=True)
+
+        self._queue_local_run(run_id, start, n_cores, script=command, log_filename=os.path.join(cwd, outfilename))
+        return None
+
+    def _execute_forked(self, fork_executor, script_filename, argv, log_filename, cpus=None, n_cores=None, run_id=None):
+        """Queue script to be forked when enough cpu cores are free"""
+        cwd = os.getcwd()
+        script_filename, log_filename = os.path.join(cwd, script_filename), os.path.join(cwd, log_filename)
+        def start():
+            return fork_executor.submit(script_filename=script_filename, argv=argv, log_filename=log_filename, cpus=cpus, cwd=cwd)
+
+        self._queue_local_run(run_id, start, n_cores, script=script_filename, log_filename=log_filename)
+        return None
+
+    def _queue_local_run(self, run_id, start, n_cores, script, log_filename):
+        with self.local_lock:
+            self.runs[run_id] = {'id': run_id,
+                                 'script': script,
+                                 'log': log_filename,
+                                 'n_cores': n_cores if n_cores is not None else 1,
+                                 'state': 'queued',
+                                 'pid': None,
+                                 'exit_code': None}
+            self.run_starters[run_id] = start
+            self.local_queue.append(run_id)
+        self.launched_run_ids.append(run_id)
+        print(f'Queued script with id: {run_id} (log at: {log_filename})')
+
+    def _local_scheduler(self):
+        """Reap finished local runs, and start queued ones (in order) as long as cpu cores are free"""
+        while not self.stop_event.is_set():
+            try:
+                finished_forks = self.fork_executor.poll()
+            except ConnectionError:
+                finished_forks = {}
+
+            with self.local_lock:
+                for pid, exit_code in finished_forks.items():
+                    if pid in self.forked_runs:
+                        self._finish_local_run(self.forked_runs.pop(pid), exit_code)
+
+                for run_id, process in list(self.run_processes.items()):
+                    if process.poll() is not None:
+                        del self.run_processes[run_id]
+                        self._finish_local_run(run_id, process.returncode)
+
+                while len(self.local_queue) > 0 and self.cores_in_use + self.runs[self.local_queue[0]]['n_cores'] <= self.max_cores:
+                    run_id = self.local_queue.popleft()
+                    run = self.runs[run_id]
+                    try:
+                        started = self.run_starters.pop(run_id)()
+                    except Exception:
+                        traceback.print_exc()
+                        run['state'] = 'failed to start'
+                        continue
+
+                    if isinstance(started, subprocess.Popen):
+                        self.run_processes[run_id] = started
+                        run['pid'] = started.pid
+                    else:
+                        self.forked_runs[started] = run_id
+                        run['pid'] = started
+                    run['state'] = 'running'
+                    self.cores_in_use += run['n_cores']
+
+            time.sleep(0.1)
+
+    def _finish_local_run(self, run_id, exit_code):
+        run = self.runs[run_id]
+        run['exit_code'] = exit_code
+        if run['state'] != 'stopped':
+            run['state'] = 'finished'
+        self.cores_in_use -= run['n_cores']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident experiments launcher, serving launch requests over a Unix socket')
+    parser.add_argument('--root', default='exps_launcher_configs', type=str, help='Path to configuration files')
+    parser.add_argument('--socket', default=None, type=str, help='Path to the Unix socket (default: <root>/daemon.sock)')
+    parser.add_argument('--max-cores', default=None, type=int, help='Max number of cpu cores used at the same time by local runs')
+    parser.add_argument('--max-jobs', default=None, type=int, help='Max number of jobs per launch request')
+    parser.add_argument('--max-pending', default=16, type=int, help='Max number of launch requests waiting to be executed')
+    parser.add_argument('--preload', default=[], type=str, nargs='*', help='Modules imported once by the fork server, for runs with exps.executor=fork')
+    args = parser.parse_args()
+
+    daemon = ExpsDaemon(root=args.root,
+                        socket_filename=args.socket,
+                        max_cores=args.max_cores,
+                        max_jobs=args.max_jobs,
+                        max_pending=args.max_pending,
+                        preload=args.preload)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+    daemon.serve_forever()
+
+if __name__ == '__main__':
+    main()
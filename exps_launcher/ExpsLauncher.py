@@ -6,10 +6,13 @@ from copy import deepcopy
 import subprocess
 import sys
 import random
+import secrets
 import string
-# import shlex
 import itertools
 import multiprocessing
+import signal
+import time
+import shlex
 
 from sklearn.model_selection import ParameterGrid
 try:
@@ -18,6 +21,9 @@ except ImportError:
     raise ImportError(f"Package omegaconf not installed.")
 
 from exps_launcher.OmegaConfParser import OmegaConfParser
+from exps_launcher.SweepSampler import SweepSampler
+from exps_launcher.ScriptSchema import ScriptSchema
+from exps_launcher.ForkExecutor import ForkExecutor
 
 class ExpsLauncher():
     """Handler class for the Experiment Launcher package"""
@@ -37,6 +43,7 @@ class ExpsLauncher():
         self.run_logs = os.path.join(self.root, 'run_logs')
         if not os.path.isdir(self.run_logs):
             self.create_dirs(self.run_logs)
+        self.schema_cache = os.path.join(self.root, '.cache')
         self.infer_cpus_per_task = infer_cpus_per_task
 
         ### Fixed parameters ######################
@@ -47,6 +54,7 @@ class ExpsLauncher():
         ###########################################
         
         self.args_parser = OmegaConfParser()
+        self.configs_cache = {}  # filename -> (modification time, parsed config)
 
     def multilaunch(self, configs):
         """Launch multiple batches of exps"""
@@ -82,7 +90,7 @@ class ExpsLauncher():
 
         default_exps_params = {}
         if os.path.isfile(default_exps_params_filename):
-            default_exps_params = OmegaConf.load(default_exps_params_filename)
+            default_exps_params = self._load_config(default_exps_params_filename)
 
         exps_params = {}
         if 'exps' in cli_args:
@@ -91,7 +99,7 @@ class ExpsLauncher():
         exps_params = OmegaConf.merge(default_exps_params, exps_params)
 
         # Hard code default boolean params if they are not in the config.yaml file
-        defaults = {'test': False, 'no_confirmation': False, 'fake': False, 'preview': False, 'force_hostname_environ': True, 'noslurm': False}
+        defaults = {'test': False, 'no_confirmation': False, 'fake': False, 'preview': False, 'force_hostname_environ': True, 'noslurm': False, 'validate_params': True, 'strict_params': False}
         for k, v in defaults.items():
             if k not in exps_params:
                 exps_params[k] = v
@@ -99,15 +107,23 @@ class ExpsLauncher():
                 assert exps_params[k] is not None, f'parameter exps.{k} should be a boolean, not None.'
 
         # Handle non-boolean defaults (does not check for them to be different than None)
-        defaults = {'cpus-list': None, 'cpus-start': None, 'cpus-per-task': None}
+        defaults = {'cpus-list': None, 'cpus-start': None, 'cpus-per-task': None, 'search': 'grid', 'n_samples': None, 'search_seed': None,
+                    'smoke': None, 'smoke_workers': None, 'smoke_timeout': None,
+                    'executor': 'shell', 'preload': []}
         for k, v in defaults.items():
             if k not in exps_params:
                 exps_params[k] = v
 
+        # Pick the seed once, so that the summary, preview and launch all sample the same sweep configurations
+        if exps_params.search != 'grid' and exps_params.search_seed is None:
+            exps_params.search_seed = secrets.randbits(32)
+
         return exps_params
 
-    def launch(self):
+    def launch(self, cli_args=None):
         """
+            cli_args : launch parameters, as parsed by OmegaConfParser. (read from command line if None)
+
             Use cliargs of type exps.<param> for extra options on this function.
             Accepted params are:
 
@@ -119,9 +135,20 @@ class ExpsLauncher():
             exps.force_hostname_environ : force environment variable to be set
                                           to recognize current hostname
             exps.cpus-list : ids of cpu cores to be used. (only for local jobs)
+            exps.search : how sweep configurations are generated, among `grid` (default), `random`, `sobol`, `halton`
+            exps.n_samples : budget of sweep configurations for random and quasi-random search
+            exps.search_seed : seed for reproducible random and quasi-random search
+            exps.smoke : int, with exps.test=true, run this many sweep configurations concurrently as a smoke test
+            exps.smoke_workers : max number of smoke test runs executed at the same time (default: all of them)
+            exps.smoke_timeout : seconds after which a smoke test run is killed and considered failed
+            exps.executor : how local background scripts are run, among `shell` (default) and `fork`
+            exps.preload : list of modules imported once before forking, with exps.executor=fork
+            exps.validate_params : bool, check script and sweep parameters against the argparse parser of <script>.py
+            exps.strict_params : bool, do not launch anything if parameters could not be validated successfully
         """
         # Read input parameters
-        cli_args = self.args_parser.parse_from_cli()
+        if cli_args is None:
+            cli_args = self.args_parser.parse_from_cli()
 
         exps_params = self._get_exps_params(cli_args)
         if 'exps' in cli_args:
@@ -190,10 +217,14 @@ class ExpsLauncher():
                               exps_params=exps_params
                               )
 
+        if exps_params.strict_params and len(self._validate_script_params(scriptname, script_params, sweep_params)) != 0:
+            print(f'--- ERROR! Script parameters could not be validated against {scriptname}.py (see WARNINGs above). No experiment has been launched.')
+            return False
+
         if not exps_params.no_confirmation and not exps_params.test and not self.ask_confirmation('Do you wish to launch these experiments? (y/n)'):
             return False
 
-        self._launch_jobs(
+        success = self._launch_jobs(
                           host_params=host_params,
                           script_params=script_params,
                           sweep_params=sweep_params,
@@ -206,19 +237,29 @@ class ExpsLauncher():
 
                           exps_params=exps_params
                         )
+        return success is not False
 
     def _launch_jobs(self, host_params, script_params, sweep_params, default_name, fake=False, test=False, with_slurm=True, exps_params={}):
         """Formats slurm strings and launches all jobs
             
             fake: prints slurm instructions instead of running them
+
+            Returns False if the smoke test failed (exps.smoke), None otherwise
         """
-        if with_slurm:
+        if test and exps_params.get('smoke', None):
+            return self._launch_smoke_test(script_params,
+                                    sweep_params,
+                                    default_name,
+                                    fake,
+                                    exps_params=exps_params)
+        elif with_slurm:
             self._launch_jobs_with_slurm(host_params,
                                          script_params,
                                          sweep_params,
                                          default_name,
                                          fake,
-                                         max_runs=1 if test else None)
+                                         max_runs=1 if test else None,
+                                         exps_params=exps_params)
         else:
             self._launch_jobs_without_slurm(script_params,
                                             sweep_params,
@@ -230,9 +271,9 @@ class ExpsLauncher():
                                             )
 
 
-    def _launch_jobs_with_slurm(self, host_params, script_params, sweep_params, default_name, fake=False, max_runs=None):
+    def _launch_jobs_with_slurm(self, host_params, script_params, sweep_params, default_name, fake=False, max_runs=None, exps_params={}):
         """Launch scripts with sbatch command"""
-        for i, sweep_config in enumerate(ParameterGrid(dict(sweep_params))):
+        for i, sweep_config in enumerate(self._get_sweep_configs(sweep_params, exps_params)):
             if max_runs is not None and i >= max_runs:
                 return
 
@@ -263,10 +304,9 @@ class ExpsLauncher():
 
 
         # Sanity check on the number of CPU cores requested vs. the available ones
-        list_of_sweeps = [c_list for c_param, c_list in sweep_params.items()]
-        n_of_configs = len(list(itertools.product(*list_of_sweeps)))
+        n_of_configs = self._get_n_exps(sweep_params, exps_params)
         assert 'now' in script_params, 'Unexpected Error: why is --now not among the script parameters? --now parameter is expected when launching local scripts to tell how many parallel CPU workers the script will be using.'
-        assert n_of_configs * script_params.now < multiprocessing.cpu_count() - 1, 'Make sure no more than the available CPU cores are used'
+        self._check_available_cores(n_of_configs, script_params.now)
 
         # Sanity checks
         if cpus_list is not None:
@@ -275,7 +315,13 @@ class ExpsLauncher():
 
         assert (cpus_start is None and cpus_per_task is None) or (cpus_start is not None and cpus_per_task is not None), 'Neither or both parameters exps.cpus-start and exps.cpus-per-task shall be defined.'
 
-        for i, sweep_config in enumerate(ParameterGrid(dict(sweep_params))):
+        executor = exps_params.get('executor', 'shell')
+        assert executor in ['shell', 'fork'], f'exps.executor should be either `shell` or `fork`, not {executor}.'
+        fork_executor, forked_pids = None, []
+        if executor == 'fork' and not foreground and not fake:
+            fork_executor = self._get_fork_executor(preload=self.args_parser.as_list(exps_params.preload) if exps_params.preload else [])
+
+        for i, sweep_config in enumerate(self._get_sweep_configs(sweep_params, exps_params)):
             if max_runs is not None and i >= max_runs:
                 return
             
@@ -285,10 +331,14 @@ class ExpsLauncher():
             curr_id = self.get_random_string(5)
             log_filename = f'runlog_{curr_id}.out'
 
+            cpus = None
             if cpus_list is not None:
-                command += f'taskset --cpu-list {cpus_list} '
+                cpus = cpus_list
             elif cpus_per_task is not None:
-                command += f'taskset --cpu-list {self.from_list_to_string(list(range(cpus_start + i*cpus_per_task, cpus_start + (i+1)*cpus_per_task)))} '
+                cpus = self.from_list_to_string(list(range(cpus_start + i*cpus_per_task, cpus_start + (i+1)*cpus_per_task)))
+
+            if cpus is not None:
+                command += f'taskset --cpu-list {cpus} '
 
             command += f'python {default_name}.py '
             command += self._format_script_params(script_params)
@@ -296,6 +346,20 @@ class ExpsLauncher():
 
             if foreground:
                 self._execute_foreground(command, fake=fake)
+            elif executor == 'fork':
+                if fake:
+                    print(f'[fork] {command}> {log_filename} 2>&1 &')
+                else:
+                    pid = self._execute_forked(fork_executor,
+                                               script_filename=f'{default_name}.py',
+                                               argv=shlex.split(self._format_script_params(script_params) + self._format_sweep_config(sweep_config)),
+                                               log_filename=log_filename,
+                                               cpus=self.from_string_to_list(cpus) if cpus is not None else None,
+                                               n_cores=script_params.now,
+                                               run_id=curr_id)
+                    if pid is not None:
+                        forked_pids.append(pid)
+                        print(f'Submitted script with PID={pid} (id: {curr_id}, log at: {log_filename})')
             else:
                 ####### TEMP LEFT OUT #######
                 # print('THE CURRENT VERSION DOES NOT LIMIT THE MAX NUMBER OF CORES REQUESTED. THIS MAY CRASH THE WHOLE SYSTEM')
@@ -305,9 +369,9 @@ class ExpsLauncher():
                 command += f'> {log_filename} '
                 command += f'2>&1 '
                 command += f'&'
-                pid = self._execute_background(command, fake=fake, outfilename=log_filename)
+                pid = self._execute_background(command, fake=fake, outfilename=log_filename, n_cores=script_params.now, run_id=curr_id)
                 
-                if not fake:
+                if not fake and pid is not None:
                     print(f'Submitted script with id: {curr_id} (log at: runlog_{curr_id}.out)')
                 # print(f'Submitted script with PID={pid} (id: {curr_id})')
                 # print(pid, file=group_pids)
@@ -320,13 +384,129 @@ class ExpsLauncher():
         if not foreground and not fake:
             print('\n----------------------------------')
             # print(f'kill all spawned processes above by PID: xargs kill < pids_{group_id}.out (DOES NOT WORK AS OF RIGHT NOW BECAUSE PIDs RETURNED ARE NO CORRECT.)')
-            print(f'Alternatively, kill all processes that match command name: pkill -f "{default_name}.py"')
+            if executor == 'fork':
+                if len(forked_pids) > 0:
+                    print(f'Kill all forked processes by PID: kill {" ".join([str(pid) for pid in forked_pids])}')
+            else:
+                print(f'Alternatively, kill all processes that match command name: pkill -f "{default_name}.py"')
             print('\nClean up commands:')
             print('rm runlog_*')
             print('rm pids_*')
             print('----------------------------------')
 
 
+    def _launch_smoke_test(self, script_params, sweep_params, default_name, fake=False, exps_params={}):
+        """Run a sample of exps.smoke sweep configurations concurrently on the local machine,
+           with test parameters. Runs are executed by a bounded pool of exps.smoke_workers processes,
+           and the smoke test stops at the first failure.
+        """
+        sweep_configs = self._sample_sweep_configs(sweep_params, exps_params, n=exps_params.smoke)
+
+        commands = []
+        for sweep_config in sweep_configs:
+            command = f'python {default_name}.py '
+            command += self._format_script_params(script_params)
+            command += self._format_sweep_config(sweep_config)
+            commands.append(command)
+
+        if fake:
+            for command in commands:
+                print(command)
+            return True
+
+        n_cores = script_params.get('now', None) or 1
+        workers = self._get_smoke_workers(exps_params.smoke_workers, len(commands), n_cores)
+
+        print(f'Smoke test of {len(commands)} sweep configurations ({workers} at a time)...')
+        results = self._run_smoke_test(commands, workers=workers, timeout=exps_params.smoke_timeout, n_cores=n_cores)
+
+        log_width = max([len(log_filename or '-') for _, _, log_filename in results]) + 2
+        print(f'\n{"#":>3}  {"STATUS":<10}{"TIME":>8}  {"LOG":<{log_width}}SWEEP CONFIG')
+        for i, (sweep_config, result) in enumerate(zip(sweep_configs, results)):
+            status, elapsed, log_filename = result
+            elapsed = f'{elapsed:.1f}s' if elapsed is not None else '-'
+            print(f'{i:>3}  {status:<10}{elapsed:>8}  {log_filename or "-":<{log_width}}{sweep_config}')
+
+        passed = all(status == 'PASS' for status, _, _ in results)
+        print(f'\nSmoke test {"PASSED" if passed else "FAILED"}.')
+        return passed
+
+
+    def _get_smoke_workers(self, workers, n_commands, n_cores):
+        """Number of smoke test runs executed at a time, each using n_cores cpu cores:
+           exps.smoke_workers, or by default as many as the available cpu cores allow
+        """
+        if workers is None:
+            workers = max(1, (multiprocessing.cpu_count() - 2) // n_cores)  # fewer than cpu_count() - 1 cores, see _check_available_cores
+        assert workers > 0, 'exps.smoke_workers should be a positive integer.'
+        workers = min(workers, n_commands)
+        self._check_available_cores(workers, n_cores)
+        return workers
+
+
+    def _run_smoke_test(self, commands, workers, timeout=None, n_cores=1):
+        """Execute commands with at most `workers` processes at a time, each using n_cores cpu cores.
+           As soon as a run fails or times out, all others are killed.
+           Returns a list of (status, elapsed seconds, log filename) tuples.
+        """
+        results = [('SKIPPED', None, None)] * len(commands)
+        pending = list(enumerate(commands))
+        running = {}  # index -> (process, start time, log file)
+        failed = False
+
+        try:
+            while len(running) > 0 or (len(pending) > 0 and not failed):
+                while len(pending) > 0 and not failed and len(running) < workers:
+                    i, command = pending.pop(0)
+                    log_filename = os.path.join(self.run_logs, f'smoke_{self.get_random_string(5)}.out')
+                    log = open(log_filename, 'w')
+                    process = subprocess.Popen(command, shell=True, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+                    running[i] = (process, time.time(), log)
+
+                for i, (process, start, log) in list(running.items()):
+                    elapsed = time.time() - start
+                    returncode = process.poll()
+                    if returncode is None and timeout is not None and elapsed > timeout:
+                        self._kill_process_group(process)
+                        status = 'TIMEOUT'
+                    elif returncode is None:
+                        continue
+                    else:
+                        status = 'PASS' if returncode == 0 else f'FAIL ({returncode})'
+
+                    log.close()
+                    results[i] = (status, elapsed, log.name)
+                    del running[i]
+                    if status != 'PASS':
+                        failed = True
+
+                if failed:
+                    for i, (process, start, log) in running.items():
+                        self._kill_process_group(process)
+                        log.close()
+                        results[i] = ('KILLED', time.time() - start, log.name)
+                    running = {}
+
+                time.sleep(0.1)
+
+        except KeyboardInterrupt:
+            for i, (process, start, log) in running.items():
+                self._kill_process_group(process)
+                log.close()
+                results[i] = ('KILLED', time.time() - start, log.name)
+
+        return results
+
+
+    def _kill_process_group(self, process):
+        """Kill a process started in its own session, together with its children"""
+        try:
+            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+
     def _execute_foreground(self, command, fake=False):
         """Execute command on the shell"""        
         if fake:
@@ -335,7 +515,26 @@ class ExpsLauncher():
             subprocess.run(command, shell=True)
 
 
-    def _execute_background(self, command, stdout=None, stderr=None, fake=False, outfilename=''):
+    def _check_available_cores(self, n_of_configs, n_cores_per_config):
+        """Sanity check on the number of CPU cores requested vs. the available ones"""
+        assert n_of_configs * n_cores_per_config < multiprocessing.cpu_count() - 1, 'Make sure no more than the available CPU cores are used'
+
+
+    def _get_fork_executor(self, preload=[]):
+        """Start a fork server with the preloaded modules (see ForkExecutor).
+           Runs already forked keep running when the fork server stops, with the launcher.
+        """
+        return ForkExecutor(preload=preload)
+
+
+    def _execute_forked(self, fork_executor, script_filename, argv, log_filename, cpus=None, n_cores=None, run_id=None):
+        """Execute script in a child process forked by fork_executor.
+           Returns the PID of the child process
+        """
+        return fork_executor.submit(script_filename=script_filename, argv=argv, log_filename=log_filename, cpus=cpus)
+
+
+    def _execute_background(self, command, stdout=None, stderr=None, fake=False, outfilename='', n_cores=None, run_id=None):
         """Execute command on the shell"""        
         if fake:
             print(command)
@@ -398,6 +597,16 @@ class ExpsLauncher():
         return string
 
 
+    def _load_config(self, filename):
+        """Load .yaml config file, reusing the parsed config
+           as long as the file has not been modified
+        """
+        mtime = os.stat(filename).st_mtime_ns
+        if filename not in self.configs_cache or self.configs_cache[filename][0] != mtime:
+            self.configs_cache[filename] = (mtime, OmegaConf.load(filename))
+        return deepcopy(self.configs_cache[filename][1])
+
+
     def _check_unexpected_script_params(self, script_configs):
         if 'exps' in script_configs:
             raise ValueError(f'`exps` param should not be controlled in the script parameters. `exps` key is reserved for exps_launcher parameters.')
@@ -434,7 +643,7 @@ class ExpsLauncher():
         assert os.path.isfile(test_params_filename), f'No test.yaml found at {test_params_filename}.' \
                                                       'but exps.test parameter=True.'
         
-        test_params = OmegaConf.load(test_params_filename)
+        test_params = self._load_config(test_params_filename)
         return test_params
 
 
@@ -451,19 +660,24 @@ class ExpsLauncher():
                         assert os.path.isfile(os.path.join(self.root, self.sweep_configs_root, self.args_parser.add_extension(sweep_conf_file))),\
                                 f'Desired .yaml file does not exist: '\
                                 f'{os.path.join(self.root, self.sweep_configs_root, self.args_parser.add_extension(sweep_conf_file))}'
-                        current =  OmegaConf.load(os.path.join(self.root, self.sweep_configs_root, self.args_parser.add_extension(sweep_conf_file)))
-                        sweeps_from_config = OmegaConf.merge(sweeps_from_config, current)
+                        current =  self._load_config(os.path.join(self.root, self.sweep_configs_root, self.args_parser.add_extension(sweep_conf_file)))
+                        sweeps_from_config = self._merge_sweeps(sweeps_from_config, current)
+                elif SweepSampler.is_distribution(cli_args.sweep[param]):
+                    sweeps[param] = cli_args.sweep[param]
                 else:
                     sweeps[param] = self.args_parser.as_list(cli_args.sweep[param])
             
             # Merge sweeps, prioritizing sweeps in command line
-            sweeps = OmegaConf.merge(sweeps_from_config, sweeps)
+            sweeps = self._merge_sweeps(sweeps_from_config, sweeps)
 
         sweep_from_script = {}
         if 'sweep' in script_params:
             for param in script_params.sweep:
-                sweep_from_script[param] = self.args_parser.as_list(script_params.sweep[param])
-        sweeps = OmegaConf.merge(sweep_from_script, sweeps)
+                if SweepSampler.is_distribution(script_params.sweep[param]):
+                    sweep_from_script[param] = script_params.sweep[param]
+                else:
+                    sweep_from_script[param] = self.args_parser.as_list(script_params.sweep[param])
+        sweeps = self._merge_sweeps(sweep_from_script, sweeps)
 
         # Delete sweep parameters that have been explicitly defined in the cli_args
         overwritten_sweep_values = {}
@@ -490,6 +704,14 @@ class ExpsLauncher():
         return sweeps, cli_args, script_params
 
 
+    def _merge_sweeps(self, sweeps, prioritized_sweeps):
+        """Merge sweep parameters, each parameter in prioritized_sweeps replacing its counterpart
+           in sweeps as a whole (e.g. a list of values may replace a distribution, and vice versa)
+        """
+        sweeps = {k: v for k, v in sweeps.items() if k not in prioritized_sweeps}
+        return OmegaConf.merge(sweeps, prioritized_sweeps)
+
+
     def _display_summary(self, scriptname, script_params, host_params, sweep_params={}, with_slurm=True, test=False, exps_params={}):
         print(f'{"="*40} SUMMARY {"="*40}')
         print(f'\nScript: {scriptname}.py')
@@ -503,14 +725,19 @@ class ExpsLauncher():
         print(self.args_parser.pformat_dict(sweep_params, indent=1))
 
         print('\nWARNINGs:')
-        warnings = self.get_warnings_list(script_params=script_params, host_params=host_params, sweep_params=sweep_params, exps_params=exps_params)
+        warnings = self.get_warnings_list(script_params=script_params, host_params=host_params, sweep_params=sweep_params, exps_params=exps_params, scriptname=scriptname)
         if warnings is None:
             print('  No warnings found.')
         else:
             for warning in warnings:
                 print(f'  {warning}')
 
-        n_exps = self._get_n_exps(sweep_params)
+        n_exps = self._get_n_exps(sweep_params, exps_params)
+        if test and exps_params['smoke']:
+            print(f'\nSmoke test: {min(exps_params.smoke, n_exps)} out of {n_exps} sweep configurations will be run locally with test parameters.')
+        if exps_params['search'] != 'grid':
+            print(f'\nSweep configurations are sampled with {exps_params["search"]} search (seed: {exps_params["search_seed"]}, ' \
+                  f'pass exps.search_seed={exps_params["search_seed"]} to sample them again).')
         print(f'\nA total number of {n_exps} jobs is requested.')
 
         if exps_params['preview']:
@@ -531,9 +758,12 @@ class ExpsLauncher():
         print(f'{"="*89}')
 
 
-    def get_warnings_list(self, script_params, host_params, sweep_params, exps_params):
+    def get_warnings_list(self, script_params, host_params, sweep_params, exps_params, scriptname=None):
         """Check for warnings to be displayed"""
         warnings = []
+        if exps_params.validate_params and scriptname is not None:
+            warnings += self._validate_script_params(scriptname, script_params, sweep_params)
+
         if exps_params.noslurm:
             assert 'now' in script_params, 'Unexpected Error: why is --now not among the script parameters? --now parameter is expected when launching local scripts to tell how many parallel CPU workers the script will be using.' 
             cpus_list, cpus_start, cpus_per_task  = exps_params['cpus-list'], exps_params['cpus-start'], exps_params['cpus-per-task']
@@ -544,11 +774,63 @@ class ExpsLauncher():
         return None if len(warnings) == 0 else warnings
 
 
-    def _get_n_exps(self, sweep_params):
-        n_exps = 1
-        for k, v in sweep_params.items():
-            n_exps *= len(v)
-        return n_exps
+    def _validate_script_params(self, scriptname, script_params, sweep_params):
+        """Validate script and sweep parameters against the argparse
+           parser of <scriptname>.py, without running the script.
+           Returns a list of warnings (empty if all parameters are valid)
+        """
+        script_filename = f'{scriptname}.py'
+        if not os.path.isfile(script_filename):
+            return [f'Script {script_filename} not found in current directory. Script parameters could not be validated.']
+
+        try:
+            schema = ScriptSchema(script_filename, cache_dir=self.schema_cache)
+        except SyntaxError as error:
+            return [f'Script {script_filename} could not be parsed ({error}). Script parameters could not be validated.']
+
+        if schema.is_empty():
+            return [f'No argparse arguments found in {script_filename}. Script parameters could not be validated.']
+
+        return schema.validate(script_params, sweep_params)
+
+
+    def _get_n_exps(self, sweep_params, exps_params={}):
+        # Also checks that sweep parameters are compatible with exps.search, before any confirmation is asked
+        return len(self._get_sweep_configs(sweep_params, exps_params))
+
+
+    def _sample_sweep_configs(self, sweep_params, exps_params={}, n=1):
+        """Returns a list of at most n sweep configurations, always including the first one.
+           Grid configurations are sampled uniformly (seeded by exps.search_seed),
+           whereas random and quasi-random searches are already spread out and simply truncated.
+        """
+        assert n >= 1, f'At least one sweep configuration should be sampled, not {n}.'
+        sweep_configs = self._get_sweep_configs(sweep_params, exps_params)
+        if exps_params.get('search', 'grid') != 'grid':
+            return list(itertools.islice(sweep_configs, n))
+
+        n_configs = len(sweep_configs)
+        rng = random.Random(exps_params.get('search_seed', None) or 0)
+        indices = [0] + sorted(rng.sample(range(1, n_configs), min(n, n_configs) - 1))
+        return [sweep_configs[i] for i in indices]
+
+
+    def _get_sweep_configs(self, sweep_params, exps_params={}):
+        """Returns the iterable of sweep configurations to be launched:
+           the full grid by default, or a lazy sampler of exps.n_samples
+           configurations for random and quasi-random search (exps.search)
+        """
+        search = exps_params.get('search', 'grid')
+        if search == 'grid':
+            for k, v in sweep_params.items():
+                if SweepSampler.is_distribution(v):
+                    raise ValueError(f'Sweep parameter {k} is defined as a distribution, which requires exps.search to be one of {SweepSampler.methods}.')
+            return ParameterGrid(dict(sweep_params))
+
+        return SweepSampler(sweep_params,
+                            n=exps_params.get('n_samples', None),
+                            method=search,
+                            seed=exps_params.get('search_seed', None))
 
 
     def _read_script_configs(self, cli_args):
@@ -569,14 +851,14 @@ class ExpsLauncher():
 
         # Load default file (if it exists)
         if os.path.isfile(os.path.join(scripts_root, 'default.yaml')):
-            default_script_configs = OmegaConf.load(os.path.join(scripts_root, 'default.yaml'))
+            default_script_configs = self._load_config(os.path.join(scripts_root, 'default.yaml'))
         
         config_names = []
         if 'config' in cli_args:
             for conf in cli_args.config:
                 assert os.path.isfile(os.path.join(scripts_root, self.args_parser.add_extension(conf))), f'Desired ' \
                         f'.yaml file does not exist: {os.path.join(scripts_root, self.args_parser.add_extension(conf))}'
-                current =  OmegaConf.load(os.path.join(scripts_root, self.args_parser.add_extension(conf)))
+                current =  self._load_config(os.path.join(scripts_root, self.args_parser.add_extension(conf)))
                 script_configs = OmegaConf.merge(script_configs, current)
                 config_names.append(conf)
 
@@ -594,11 +876,11 @@ class ExpsLauncher():
         assert os.path.isfile(config_filename), f'Host config path does not exist on current system: {config_filename}. ' \
                                                 'Make sure that you create a yaml config file for this hostname.'
 
-        host_configs = OmegaConf.load(config_filename)
+        host_configs = self._load_config(config_filename)
 
         # Load default file (if it exists)
         if os.path.isfile(os.path.join(host_root, 'default.yaml')):
-            default_host_configs = OmegaConf.load(os.path.join(host_root, 'default.yaml'))
+            default_host_configs = self._load_config(os.path.join(host_root, 'default.yaml'))
             # Merge, priority on host_configs
             host_configs = OmegaConf.merge(default_host_configs, host_configs)
 
@@ -652,6 +934,19 @@ class ExpsLauncher():
     def get_random_string(self, n=5):
         return ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(n))
 
+    def from_string_to_list(self, seq_string):
+        """Map string of comma-separated items and ranges
+           (taskset --cpu-list format, e.g. "0,2,4-7") into list of ints
+        """
+        seq = []
+        for item in str(seq_string).split(','):
+            if '-' in item:
+                start, end = item.split('-')
+                seq += list(range(int(start), int(end)+1))
+            else:
+                seq.append(int(item))
+        return seq
+
     def from_list_to_string(self, seq):
         """Map list `seq` into string of items
             separated by a comma
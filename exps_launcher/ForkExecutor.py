@@ -0,0 +1,205 @@
+import atexit
+import importlib
+import json
+import os
+import random
+import runpy
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+
+class ForkExecutor():
+    """Local executor forking runs from one warm, single-threaded fork server.
+
+        When the executor is created, a fork server process is started and
+        heavy modules (e.g. torch, gym) are imported in it once. Each run is then
+        a child forked by the server, which inherits them and executes the script
+        as `__main__` with the given argv, instead of paying the import cost of a
+        fresh `python <script>.py` call.
+
+        The fork server stays single-threaded, so that forking it is safe even if
+        the process that created the executor later starts threads (e.g. ExpsDaemon).
+        The executor must therefore be created before any thread is started.
+
+        Exit handlers registered by the script (`atexit`) are run when it ends,
+        as they would be in a new `python <script>.py` process.
+
+        Global random number generators inherited from the server (python's
+        `random`, and numpy's or torch's if preloaded) are reseeded with fresh
+        entropy in each child, as they would be in a new `python <script>.py` process.
+
+        Note: modules that start threads at import time may not be fork-safe.
+    """
+
+    def __init__(self, preload=[]):
+        """
+            preload : list of module names to be imported by the fork server
+        """
+        parent_connection, server_connection = socket.socketpair()
+
+        # Flush buffered output, so that it is not duplicated in the fork server
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            parent_connection.close()
+            try:
+                self._serve(server_connection)
+            finally:
+                os._exit(0)
+
+        server_connection.close()
+        self.server_pid = pid
+        self.connection = parent_connection
+        self.reader = parent_connection.makefile('r', encoding='utf-8')
+        self.lock = threading.Lock()
+
+        self.preloaded = self.preload(preload)
+
+    def preload(self, modules):
+        """Import modules in the fork server, so that runs forked later inherit them.
+           Returns the list of modules successfully imported
+        """
+        errors = self._request({'op': 'preload', 'modules': list(modules)})['errors']
+        for module, error in errors.items():
+            print(f'--- WARNING! Module {module} could not be preloaded: {error}')
+        return [module for module in modules if module not in errors]
+
+    def submit(self, script_filename, argv, log_filename, cpus=None, cwd=None):
+        """Fork a child process that runs `script_filename` with `argv` in background.
+
+            argv : list of command line arguments for the script
+            log_filename : file where stdout and stderr of the run are redirected
+            cpus : list of cpu core ids the run is pinned to (no pinning if None)
+            cwd : directory the run is executed from (default: current directory)
+
+            Returns the PID of the child process
+        """
+        run = {'script_filename': script_filename,
+               'argv': list(argv),
+               'log_filename': log_filename,
+               'cpus': list(cpus) if cpus is not None else None,
+               'cwd': cwd if cwd is not None else os.getcwd()}
+        return self._request({'op': 'submit', 'run': run})['pid']
+
+    def poll(self):
+        """Returns a dict of PIDs to exit codes, for the runs that finished since the last call"""
+        finished = self._request({'op': 'poll'})['finished']
+        return {int(pid): exit_code for pid, exit_code in finished.items()}
+
+    def close(self):
+        """Stop the fork server. Runs already forked are not affected"""
+        self.connection.close()
+
+    def _request(self, request):
+        with self.lock:
+            self.connection.sendall((json.dumps(request) + '\n').encode('utf-8'))
+            reply = self.reader.readline()
+        if len(reply) == 0:
+            raise ConnectionError('The fork server is not running anymore.')
+        return json.loads(reply)
+
+    def _serve(self, connection):
+        """Fork server loop: handle requests until the executor is closed (or its process exits)"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # stopped by closing the connection instead
+        finished = {}
+        reader = connection.makefile('r', encoding='utf-8')
+        for line in reader:
+            request = json.loads(line)
+            if request['op'] == 'preload':
+                reply = {'errors': self._import_modules(request['modules'])}
+            elif request['op'] == 'submit':
+                reply = {'pid': self._fork_run(connection, **request['run'])}
+            elif request['op'] == 'poll':
+                self._reap_children(finished)
+                reply = {'finished': finished}
+                finished = {}
+            else:
+                reply = {'error': f'Unknown request: {request["op"]}'}
+            connection.sendall((json.dumps(reply) + '\n').encode('utf-8'))
+
+    def _import_modules(self, modules):
+        errors = {}
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except ImportError as error:
+                errors[module] = str(error)
+        return errors
+
+    def _reap_children(self, finished):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            finished[pid] = os.waitstatus_to_exitcode(status)
+
+    def _fork_run(self, connection, script_filename, argv, log_filename, cpus, cwd):
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid != 0:
+            return pid
+
+        exit_code = 1
+        try:
+            connection.close()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os.setsid()  # detach from the launcher's terminal signals (e.g. Ctrl-C)
+            os.chdir(cwd)
+
+            log_fd = os.open(log_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.dup2(log_fd, 1)
+            os.dup2(log_fd, 2)
+            os.close(log_fd)
+            null_fd = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(null_fd, 0)
+            os.close(null_fd)
+            # Make sure python-level streams write to the redirected file descriptors
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+            if cpus is not None:
+                os.sched_setaffinity(0, cpus)
+
+            self._reseed_global_rngs()
+            atexit._clear()  # exit handlers inherited from the fork server are not the run's own
+
+            sys.argv = [script_filename] + list(argv)
+            sys.path[0] = os.path.dirname(os.path.abspath(script_filename))
+            runpy.run_path(script_filename, run_name='__main__')
+            exit_code = 0
+
+        except SystemExit as error:
+            if error.code is None:
+                exit_code = 0
+            elif isinstance(error.code, int):
+                exit_code = error.code
+            else:
+                print(error.code, file=sys.stderr)
+                exit_code = 1
+
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+
+        finally:
+            atexit._run_exitfuncs()  # e.g. wandb.finish, logging.shutdown, as on a normal interpreter exit
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _reseed_global_rngs(self):
+        """Reseed global RNGs with fresh entropy, so that forked runs do not share the parent's RNG state"""
+        random.seed()
+        if 'numpy' in sys.modules:
+            sys.modules['numpy'].random.seed()
+        if 'torch' in sys.modules:
+            sys.modules['torch'].seed()
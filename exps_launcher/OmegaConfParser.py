@@ -18,6 +18,12 @@ class OmegaConfParser():
         args = OmegaConf.from_cli()  # Read the cli args
         args = self.pars_as_list(args, self.params_as_list)
         return args
+
+    def parse_from_dotlist(self, dotlist):
+        """Parse a list of cli-like args, e.g. ['script=script1', 'config=[conf1,conf2]']"""
+        args = OmegaConf.from_dotlist(list(dotlist))
+        args = self.pars_as_list(args, self.params_as_list)
+        return args
     
     def add_extension(self, config_file):
         assert type(config_file) == str
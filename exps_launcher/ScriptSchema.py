@@ -0,0 +1,331 @@
+import ast
+import difflib
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from exps_launcher.OmegaConfParser import OmegaConfParser
+from exps_launcher.SweepSampler import SweepSampler
+
+# Run the top-level statements of the script up to its first parse_args() call, dump the schema
+# of that parser and exit. Once a parser is built, execution stops at the first top-level statement
+# that neither imports, defines or sets up parsers, so that the script body is never run.
+_DUMP_PARSER_CODE = '''
+import argparse, ast, builtins, json, os, sys
+script_filename, schema_filename = sys.argv[1], sys.argv[2]
+parser_setup_calls = ['ArgumentParser', 'add_argument', 'add_argument_group', 'add_mutually_exclusive_group',
+                      'add_subparsers', 'add_parser', 'set_defaults', 'parse_args', 'parse_known_args']
+built_parsers, known_args_parsers = [], []
+
+def dump_parser(parser, complete):
+    arguments = {}
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            complete = False
+        if len(action.option_strings) == 0:
+            continue
+        type_name = 'str' if action.type is None else getattr(action.type, '__name__', None)
+        try:
+            choices = json.loads(json.dumps(list(action.choices))) if action.choices is not None else None
+        except (TypeError, ValueError):
+            choices = None
+        properties = {
+            'flag': action.nargs == 0,
+            'type': type_name if type_name in ['int', 'float', 'str'] else None,
+            'nargs': None if action.nargs in [None, '?'] else action.nargs,
+            'choices': choices,
+        }
+        for option_string in action.option_strings:
+            arguments[option_string] = properties
+    with open(schema_filename, 'w', encoding='utf-8') as file:
+        json.dump({'arguments': arguments, 'complete': complete}, file)
+    os._exit(0)
+
+def stop():
+    # A parser only used through parse_known_args() may not hold all arguments (e.g. a pre-parser)
+    if len(known_args_parsers) > 0:
+        dump_parser(known_args_parsers[-1], complete=False)
+    os._exit(0)
+
+original_init, original_parse_known_args = argparse.ArgumentParser.__init__, argparse.ArgumentParser.parse_known_args
+
+def init(self, *args, **kwargs):
+    original_init(self, *args, **kwargs)
+    built_parsers.append(self)
+
+def parse_known_args(self, *args, **kwargs):
+    known_args_parsers.append(self)
+    return original_parse_known_args(self, *args, **kwargs)
+
+argparse.ArgumentParser.__init__ = init
+argparse.ArgumentParser.parse_known_args = parse_known_args
+argparse.ArgumentParser.parse_args = lambda self, *args, **kwargs: dump_parser(self, complete=True)
+
+def is_main_guard(statement):
+    return isinstance(statement, ast.If) and ast.unparse(statement.test).replace('"', "'") in ["__name__ == '__main__'", "'__main__' == __name__"]
+
+def is_parser_setup(statement):
+    if isinstance(statement, ast.For):
+        return len(statement.orelse) == 0 and all(is_parser_setup(s) for s in statement.body)
+    value = statement.value if isinstance(statement, (ast.Expr, ast.Assign, ast.AnnAssign)) else None
+    if not isinstance(value, ast.Call):
+        return False
+    name = value.func.attr if isinstance(value.func, ast.Attribute) else getattr(value.func, 'id', None)
+    return name in parser_setup_calls
+
+def run(statements, namespace):
+    for statement in statements:
+        if is_main_guard(statement):
+            run(statement.body, namespace)
+            continue
+        if len(built_parsers) > 0 and not is_parser_setup(statement) and \\
+                not isinstance(statement, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            stop()
+        exec(compile(ast.Module([statement], type_ignores=[]), script_filename, 'exec'), namespace)
+
+with open(script_filename, 'rb') as file:
+    tree = ast.parse(file.read(), filename=script_filename)
+sys.argv = [script_filename]
+sys.path[0] = os.path.dirname(os.path.abspath(script_filename))
+try:
+    run(tree.body, {'__name__': '__main__', '__file__': os.path.abspath(script_filename), '__builtins__': builtins})
+finally:
+    stop()
+'''
+
+
+class ScriptSchema():
+    """Argument schema of a python script, introspected from its argparse parser.
+
+        If the script source builds an `ArgumentParser` and calls `parse_args()`, the
+        script is run in a subprocess only up to its first `parse_args()` call, where
+        the actual parser is dumped (including arguments defined in imported helpers
+        or parent parsers) and the subprocess exits. Once a parser is built, the
+        subprocess also stops at the first top-level statement that does not import,
+        define or set up parsers, so that the script body (e.g. training) is not run.
+        The discovered schema is cached on disk, keyed by the hash of the script file.
+
+        If the parser cannot be reached this way, every `.add_argument(...)` call of
+        the script source is inspected statically instead. Arguments that cannot be
+        discovered (option strings that are not literals, parent parsers, parsers
+        built in other modules or only used through `parse_known_args()`) make the
+        schema incomplete: unknown parameters are then not reported.
+    """
+    cache_version = 4
+
+    def __init__(self, script_filename, cache_dir=None, timeout=60):
+        """
+            script_filename : path to the python script, e.g. `script1.py`
+            cache_dir : directory where discovered schemas are cached (no caching if None)
+            timeout : seconds given to the script to reach its parse_args() call
+        """
+        self.script_filename = script_filename
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        schema = self._load()
+        self.arguments = schema['arguments']
+        self.complete = schema['complete']
+
+    def is_empty(self):
+        return len(self.arguments) == 0 and self.complete
+
+    def validate(self, script_params, sweep_params={}):
+        """Returns a list of warnings for parameters unknown to the script
+           or whose values do not match the expected types
+        """
+        if len(self.arguments) == 0 and not self.complete:
+            return [f'The argparse arguments of {self.script_filename} could not be discovered. Script parameters could not be validated.']
+
+        warnings = []
+        for k, v in script_params.items():
+            warnings += self._validate_param(k, v)
+
+        for k, v in sweep_params.items():
+            if SweepSampler.is_distribution(v):
+                warnings += self._validate_distribution(k, v)
+            elif f'--{k}' not in self.arguments:
+                # Report unknown sweep parameters once, rather than once per value
+                warnings += [self._unknown_param_warning(k, f'sweep.{k}')] if self.complete else []
+            else:
+                for single_v in v:
+                    warnings += self._validate_param(k, single_v, sweep=True)
+
+        return warnings
+
+    def _validate_param(self, k, v, sweep=False):
+        name = f'sweep.{k}' if sweep else k
+        if f'--{k}' not in self.arguments:
+            return [self._unknown_param_warning(k, name)] if self.complete else []
+
+        arg = self.arguments[f'--{k}']
+        if OmegaConfParser.is_boolean(v):
+            if not arg['flag'] and v:
+                return [f'--{k} is passed as a flag ({name}={v}), but {self.script_filename} expects a value for it.']
+            return []
+
+        if arg['flag']:
+            return [f'--{k} is a flag in {self.script_filename}, but value {v} is passed for it. Use {name}=true instead.']
+
+        if OmegaConfParser.is_list(v):
+            if arg['nargs'] is None:
+                return [f'--{k} expects a single value in {self.script_filename}, but a list {v} is passed for it.']
+            values = list(v)
+        else:
+            values = [v]
+
+        warnings = []
+        for single_v in values:
+            if not self._check_type(arg['type'], single_v):
+                warnings.append(f'--{k} expects type {arg["type"]} in {self.script_filename}, but value {single_v} is passed for it.')
+            elif arg['choices'] is not None and self._cast(arg['type'], single_v) not in arg['choices']:
+                warnings.append(f'--{k} expects one of {arg["choices"]} in {self.script_filename}, but value {single_v} is passed for it.')
+        return warnings
+
+    def _validate_distribution(self, k, v):
+        if f'--{k}' not in self.arguments:
+            return [self._unknown_param_warning(k, f'sweep.{k}')] if self.complete else []
+
+        arg = self.arguments[f'--{k}']
+        if v['distribution'] == 'choice':
+            return [w for single_v in v['values'] for w in self._validate_param(k, single_v, sweep=True)]
+        elif v['distribution'] in ['uniform', 'loguniform'] and arg['type'] == 'int':
+            return [f'--{k} expects type int in {self.script_filename}, but sweep.{k} samples from a continuous {v["distribution"]} distribution.']
+        return []
+
+    def _unknown_param_warning(self, k, name):
+        warning = f'Unknown parameter {name}: {self.script_filename} has no --{k} argument.'
+        close_matches = difflib.get_close_matches(f'--{k}', self.arguments.keys(), n=1)
+        if len(close_matches) > 0:
+            warning += f' Did you mean {close_matches[0]}?'
+        return warning
+
+    def _check_type(self, type_name, v):
+        try:
+            self._cast(type_name, v)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    def _cast(self, type_name, v):
+        if type_name == 'int':
+            return int(str(v))
+        elif type_name == 'float':
+            return float(str(v))
+        elif type_name == 'str':
+            return str(v)
+        # Custom types cannot be checked statically
+        return v
+
+    def _load(self):
+        """Read schema from cache, or introspect the script and cache it"""
+        with open(self.script_filename, 'rb') as file:
+            source = file.read()
+
+        cache_filename = None
+        if self.cache_dir is not None:
+            file_hash = hashlib.sha256(source).hexdigest()
+            cache_filename = os.path.join(self.cache_dir, f'schema_v{self.cache_version}_{file_hash}.json')
+            if os.path.isfile(cache_filename):
+                with open(cache_filename, 'r', encoding='utf-8') as file:
+                    return json.load(file)
+
+        tree = ast.parse(source, filename=self.script_filename)
+        schema = None
+        if self._has_call(tree, 'ArgumentParser') and self._has_call(tree, 'parse_args'):
+            schema = self._introspect_parser()
+        if schema is None:
+            schema = self._introspect_source(tree)
+
+        if cache_filename is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_filename, 'w', encoding='utf-8') as file:
+                json.dump(schema, file)
+
+        return schema
+
+    def _introspect_parser(self):
+        """Dump the parser of the script, as built when the script parses its arguments.
+           Returns None if the parser could not be reached.
+        """
+        schema_fd, schema_filename = tempfile.mkstemp(suffix='.json')
+        os.close(schema_fd)
+        try:
+            subprocess.run([sys.executable, '-c', _DUMP_PARSER_CODE, self.script_filename, schema_filename],
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           timeout=self.timeout)
+            with open(schema_filename, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (subprocess.TimeoutExpired, ValueError):
+            return None  # parse_args() not reached, schema file left empty
+        finally:
+            os.remove(schema_filename)
+
+    def _introspect_source(self, tree):
+        """Find all `.add_argument(...)` calls in the syntax tree of the script.
+           Returns a dict of option strings (e.g. `--seed`) to their properties,
+           and whether all option strings could be discovered.
+        """
+        arguments = {}
+        complete = True
+        parser_built_locally = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call) and self._call_name(node) == 'ArgumentParser':
+                parser_built_locally = True
+                if any(kw.arg == 'parents' for kw in node.keywords):
+                    complete = False
+
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'add_argument'):
+                continue
+
+            if not all(isinstance(a, ast.Constant) for a in node.args):
+                complete = False
+
+            option_strings = [a.value for a in node.args if isinstance(a, ast.Constant) and isinstance(a.value, str) and a.value.startswith('-')]
+            if len(option_strings) == 0:
+                continue  # positional argument
+
+            keywords = {kw.arg: kw.value for kw in node.keywords if kw.arg is not None}
+            action = self._literal(keywords.get('action'))
+            nargs = self._literal(keywords.get('nargs'))
+            choices = self._literal(keywords.get('choices'))
+            properties = {
+                'flag': action in ['store_true', 'store_false', 'store_const', 'count'] or self._is_boolean_optional_action(keywords.get('action')),
+                'type': self._type_name(keywords.get('type')),
+                'nargs': None if nargs in [None, '?'] else nargs,
+                'choices': list(choices) if isinstance(choices, (list, tuple, set)) else None,
+            }
+            for option_string in option_strings:
+                arguments[option_string] = properties
+
+        return {'arguments': arguments, 'complete': complete and parser_built_locally}
+
+    def _has_call(self, tree, name):
+        return any(isinstance(node, ast.Call) and self._call_name(node) == name for node in ast.walk(tree))
+
+    def _call_name(self, node):
+        if isinstance(node.func, ast.Attribute):
+            return node.func.attr
+        elif isinstance(node.func, ast.Name):
+            return node.func.id
+        return None
+
+    def _type_name(self, node):
+        if node is None:
+            return 'str'
+        if isinstance(node, ast.Name) and node.id in ['int', 'float', 'str']:
+            return node.id
+        return None
+
+    def _literal(self, node):
+        if node is None:
+            return None
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError):
+            return None
+
+    def _is_boolean_optional_action(self, node):
+        return isinstance(node, ast.Attribute) and node.attr == 'BooleanOptionalAction'
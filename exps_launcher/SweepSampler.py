@@ -0,0 +1,130 @@
+from collections.abc import Mapping
+import math
+import warnings
+
+import numpy as np
+try:
+    from omegaconf import OmegaConf
+except ImportError:
+    raise ImportError(f"Package omegaconf not installed.")
+
+
+class SweepSampler():
+    """Budgeted random and quasi-random search over sweep parameters.
+
+        Sweep parameters are either lists of values (treated as a uniform
+        `choice` among them) or distributions declared as mappings, e.g.:
+
+            lr:
+              distribution: loguniform
+              low: 1e-5
+              high: 1e-2
+
+        Points are drawn in the unit hypercube by a seeded random, Sobol or Halton
+        generator, then mapped onto each parameter's distribution with vectorised
+        numpy operations. Configurations are yielded lazily, chunk by chunk.
+    """
+    methods = ['random', 'sobol', 'halton']
+    distributions = ['uniform', 'loguniform', 'choice', 'int']
+
+    def __init__(self, sweep_params, n, method='random', seed=None, chunk_size=4096):
+        """
+            sweep_params : dict of sweep parameters (lists or distribution mappings)
+            n : budget, i.e. total number of configurations to generate
+            method : one of `random`, `sobol`, `halton`
+            seed : seed for reproducible generation (scrambling, for quasi-random methods)
+            chunk_size : number of points generated at once
+        """
+        assert method in self.methods, f'Unknown search method: {method}. Accepted methods are {self.methods}'
+        assert n is not None and int(n) > 0, f'A positive budget exps.n_samples is required for {method} search, not {n}.'
+        self.n = int(n)
+        self.method = method
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        self.keys = list(sweep_params.keys())
+        assert len(self.keys) > 0, f'{method} search requires at least one sweep parameter to sample from.'
+        self.specs = [self._parse_spec(k, sweep_params[k]) for k in self.keys]
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        engine = self._get_engine()
+        generated = 0
+        while generated < self.n:
+            size = min(self.chunk_size, self.n - generated)
+            unit_samples = self._draw(engine, size)
+            columns = [self._map_column(spec, unit_samples[:, j]) for j, spec in enumerate(self.specs)]
+            for row in zip(*columns):
+                yield dict(zip(self.keys, row))
+            generated += size
+
+    @staticmethod
+    def is_distribution(val):
+        """Whether a sweep value is a distribution declaration (rather than a list of values)"""
+        return isinstance(val, Mapping) and 'distribution' in val
+
+    def _parse_spec(self, key, val):
+        if not self.is_distribution(val):
+            values = OmegaConf.to_container(val) if OmegaConf.is_config(val) else list(val)
+            assert len(values) > 0, f'Sweep parameter {key} has no values.'
+            return {'distribution': 'choice', 'values': values}
+
+        spec = OmegaConf.to_container(val) if OmegaConf.is_config(val) else dict(val)
+        dist = spec['distribution']
+        assert dist in self.distributions, f'Unknown distribution `{dist}` for sweep parameter {key}. ' \
+                                           f'Accepted distributions are {self.distributions}'
+        if dist == 'choice':
+            assert 'values' in spec and len(spec['values']) > 0, f'Sweep parameter {key}: `choice` distribution requires a non-empty `values` list.'
+        else:
+            assert 'low' in spec and 'high' in spec, f'Sweep parameter {key}: `{dist}` distribution requires `low` and `high`.'
+            spec['low'], spec['high'] = float(spec['low']), float(spec['high'])
+            assert spec['low'] <= spec['high'], f'Sweep parameter {key}: `low` must not be greater than `high`.'
+            if dist == 'loguniform':
+                assert spec['low'] > 0, f'Sweep parameter {key}: `loguniform` distribution requires `low` > 0.'
+            if dist == 'int':
+                spec['low'], spec['high'] = math.ceil(spec['low']), math.floor(spec['high'])
+                assert spec['low'] <= spec['high'], f'Sweep parameter {key}: no integer lies between `low` and `high`.'
+        return spec
+
+    def _get_engine(self):
+        d = len(self.specs)
+        if self.method == 'random':
+            return np.random.default_rng(self.seed)
+
+        from scipy.stats import qmc
+        if self.method == 'sobol':
+            return qmc.Sobol(d=d, scramble=True, seed=self.seed)
+        else:
+            return qmc.Halton(d=d, scramble=True, seed=self.seed)
+
+    def _draw(self, engine, size):
+        """Draw `size` points in the unit hypercube [0, 1)^d"""
+        if self.method == 'random':
+            return engine.random((size, len(self.specs)))
+        else:
+            with warnings.catch_warnings():
+                # Sobol balance properties only hold for powers of 2, which budgets rarely are
+                warnings.simplefilter('ignore', category=UserWarning)
+                return engine.random(size)
+
+    def _map_column(self, spec, u):
+        """Map unit samples `u` onto the distribution `spec`.
+           Returns a list of python scalars, ready to be formatted.
+        """
+        dist = spec['distribution']
+        if dist == 'uniform':
+            return (spec['low'] + u * (spec['high'] - spec['low'])).tolist()
+        elif dist == 'loguniform':
+            log_low, log_high = np.log(spec['low']), np.log(spec['high'])
+            return np.exp(log_low + u * (log_high - log_low)).tolist()
+        elif dist == 'int':
+            n_values = spec['high'] - spec['low'] + 1
+            idx = np.minimum(np.floor(u * n_values).astype(np.int64), n_values - 1)
+            return (spec['low'] + idx).tolist()
+        else:
+            values = np.empty(len(spec['values']), dtype=object)
+            values[:] = spec['values']
+            idx = np.minimum(np.floor(u * len(values)).astype(np.int64), len(values) - 1)
+            return values[idx].tolist()
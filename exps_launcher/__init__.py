@@ -1 +1,8 @@
-from . import ExpsLauncher
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name):
+    # Submodules are imported on first access, so that e.g. ExpsClient does not pay for the launcher's heavy imports
+    if name == 'ExpsLauncher':
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -5,11 +5,14 @@
         
 
 """
+import sys
+
 from exps_launcher.ExpsLauncher import ExpsLauncher
 
 def main():
     expsLauncher = ExpsLauncher(root='exps_launcher_configs')
-    expsLauncher.launch()
+    success = expsLauncher.launch()
+    sys.exit(0 if success else 1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file